@@ -1,6 +1,7 @@
 const fs = require('fs')
 const { parse } = require('csv-parse/sync')
 const { stringify } = require('csv-stringify/sync')
+const { writeCatalogFileSync } = require('./utils/catalog-file')
 
 async function addNewReleasesColumn() {
   try {
@@ -44,7 +45,7 @@ async function addNewReleasesColumn() {
       columns: columns 
     })
     
-    fs.writeFileSync('export.csv', csvOutput, 'utf-8')
+    writeCatalogFileSync('export.csv', csvOutput)
     console.log('CSV file updated successfully with show_in_new_releases column!')
     
   } catch (error) {
@@ -1,6 +1,7 @@
 const fs = require('fs')
 const { parse } = require('csv-parse/sync')
 const { stringify } = require('csv-stringify/sync')
+const { writeCatalogFileSync } = require('./utils/catalog-file')
 
 async function addReleasedDateColumn() {
   try {
@@ -42,7 +43,7 @@ async function addReleasedDateColumn() {
       columns: columns 
     })
     
-    fs.writeFileSync('export.csv', csvOutput, 'utf-8')
+    writeCatalogFileSync('export.csv', csvOutput)
     console.log('CSV file updated successfully with released_date column!')
     
   } catch (error) {
@@ -1,6 +1,7 @@
 import { NextRequest, NextResponse } from 'next/server'
 import { promises as fs } from 'fs'
 import path from 'path'
+import { writeCatalogFile } from '../../../../lib/catalog-file'
 
 const CSV_PATH = path.join(process.cwd(), 'export.csv')
 
@@ -54,8 +55,9 @@ export async function POST(request: NextRequest) {
     const body = await request.json()
     const testData = body.testData || 'test,data,write'
     
-    // Try to append test data
-    await fs.appendFile(CSV_PATH, `\n# TEST LINE: ${new Date().toISOString()}`)
+    // Try to append test data (rewritten atomically so readers never see a partial append)
+    const current = await fs.readFile(CSV_PATH, 'utf-8')
+    await writeCatalogFile(CSV_PATH, `${current}\n# TEST LINE: ${new Date().toISOString()}`)
     
     return NextResponse.json({
       success: true,
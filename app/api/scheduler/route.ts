@@ -3,6 +3,7 @@ import { promises as fs } from 'fs'
 import path from 'path'
 import { parse } from 'csv-parse/sync'
 import { stringify } from 'csv-stringify/sync'
+import { writeCatalogFile } from '../../../lib/catalog-file'
 
 const CSV_PATH = path.join(process.cwd(), 'export.csv')
 
@@ -65,7 +66,7 @@ export async function POST() {
         columns: Object.keys(updatedRecords[0])
       })
       
-      await fs.writeFile(CSV_PATH, csvOutput, 'utf-8')
+      await writeCatalogFile(CSV_PATH, csvOutput)
       console.log(`Successfully auto-launched ${updatedCount} product(s)`)
       
       return NextResponse.json({ 
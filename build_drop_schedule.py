@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+Drop-schedule timeline for the auto-launch scheduler.
+
+Precomputes a time-ordered list of pending catalog transitions so a
+scheduler tick only has to look at what is due instead of reparsing and
+checking every row of export.csv. Only launches change the catalog, the
+same one app/api/scheduler/route.ts makes:
+
+  launch       status=coming-soon + drop_date   -> status=live, released_date=now,
+                                                   show_in_new_releases=true
+
+The other entries are read-only timeline events that `due` and `apply`
+report without touching the CSV:
+
+  go-live      sale_state=PREVIEW + release_at  release_at reached; PREVIEW stock
+                                                may not have arrived, so sale_state
+                                                is left to the admin
+  new-expiry   show_in_new_releases=true        leaves the New Releases window
+               + released_date                  NEW_RELEASE_DAYS after release
+                                                (lib/new-releases.ts filters at read time)
+
+After an admin edit, call DropSchedule.update_row(row) or run
+`update SKU` so the queue follows the change without a full rebuild.
+
+The launch emails sent by app/api/scheduler/route.ts are not sent here.
+`apply --json` prints each launch with its title, first image and price, so
+the caller can POST them to /api/email/notify-drop.
+
+Usage:
+    python3 build_drop_schedule.py build [--csv export.csv]
+    python3 build_drop_schedule.py due [--before 2025-09-01T00:00]
+    python3 build_drop_schedule.py apply [--csv export.csv] [--now 2025-09-01T00:00] [--json]
+    python3 build_drop_schedule.py update IF_FACE0CEA [--csv export.csv]
+    python3 build_drop_schedule.py remove IF_FACE0CEA
+"""
+
+import argparse
+import bisect
+import csv
+import json
+import re
+import sys
+from datetime import datetime, timedelta, timezone
+
+from catalog_publish import publish_catalog, write_atomic, writer_lock
+
+SCHEDULE_PATH = 'drop_schedule.json'
+SCHEDULE_VERSION = 1
+
+# Matches the default window used by getNewReleases() in lib/new-releases.ts
+NEW_RELEASE_DAYS = 7
+
+# Entry kinds that are only reported, never applied to the CSV
+EVENT_KINDS = ('go-live', 'new-expiry')
+
+DATE_ONLY_RE = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+
+
+def parse_time(value):
+    """
+    Parse the ISO-ish dates stored in the CSV the way JS new Date() does:
+    date-only values are UTC midnight, naive date-times are local time
+    """
+    value = (value or '').strip()
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        if DATE_ONLY_RE.match(value):
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        else:
+            parsed = parsed.astimezone()
+    return parsed.timestamp()
+
+
+def to_iso(timestamp):
+    """Same shape as JavaScript's Date.toISOString()"""
+    moment = datetime.fromtimestamp(timestamp, tz=timezone.utc)
+    return moment.strftime('%Y-%m-%dT%H:%M:%S.') + f'{moment.microsecond // 1000:03d}Z'
+
+
+def pending_transitions(row, after=None):
+    """
+    Every transition a single row is waiting on, as (time, sku, kind, source).
+    Events at or before `after` are left out, since they have been reported.
+    """
+    sku = row.get('sku')
+    if not sku:
+        return []
+
+    entries = []
+
+    drop_date = row.get('drop_date', '')
+    due = parse_time(drop_date)
+    if row.get('status') == 'coming-soon' and due is not None:
+        entries.append((due, sku, 'launch', drop_date))
+
+    release_at = row.get('release_at', '')
+    due = parse_time(release_at)
+    if row.get('sale_state') == 'PREVIEW' and due is not None:
+        entries.append((due, sku, 'go-live', release_at))
+
+    released_date = row.get('released_date', '')
+    released = parse_time(released_date)
+    if row.get('show_in_new_releases') == 'true' and released is not None:
+        expires = released + timedelta(days=NEW_RELEASE_DAYS).total_seconds()
+        entries.append((expires, sku, 'new-expiry', released_date))
+
+    if after is not None:
+        entries = [entry for entry in entries if entry[2] not in EVENT_KINDS or entry[0] > after]
+    return entries
+
+
+def still_pending(row, source):
+    """Guard against edits made after a launch was scheduled"""
+    return row.get('status') == 'coming-soon' and row.get('drop_date') == source
+
+
+def apply_launch(row, now):
+    # Same changes as app/api/scheduler/route.ts
+    row['status'] = 'live'
+    row['drop_date'] = ''
+    row['released_date'] = to_iso(now)
+    row['show_in_new_releases'] = 'true'
+
+
+class DropSchedule:
+    """Transitions kept sorted by time, so 'what is due before T' is a bisect"""
+
+    def __init__(self, entries=()):
+        self.entries = sorted(tuple(entry) for entry in entries)
+        self._by_sku = {}
+        for entry in self.entries:
+            self._by_sku.setdefault(entry[1], set()).add(entry)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def push(self, entry):
+        entry = tuple(entry)
+        if entry in self._by_sku.get(entry[1], ()):
+            return
+        bisect.insort(self.entries, entry)
+        self._by_sku.setdefault(entry[1], set()).add(entry)
+
+    def remove_sku(self, sku):
+        """Drop every pending transition for sku"""
+        entries = self._by_sku.pop(sku, set())
+        for entry in entries:
+            index = bisect.bisect_left(self.entries, entry)
+            del self.entries[index]
+        return len(entries)
+
+    def update_row(self, row, after=None):
+        """Replace a SKU's pending transitions with those of its current row"""
+        self.remove_sku(row.get('sku'))
+        for entry in pending_transitions(row, after):
+            self.push(entry)
+
+    def due(self, before):
+        """Entries scheduled at or before `before` (epoch seconds)"""
+        cut = bisect.bisect_right(self.entries, (before, chr(0x10FFFF)))
+        return self.entries[:cut]
+
+    def pop_due(self, before):
+        due = self.due(before)
+        del self.entries[:len(due)]
+        for entry in due:
+            entries = self._by_sku[entry[1]]
+            entries.discard(entry)
+            if not entries:
+                del self._by_sku[entry[1]]
+        return due
+
+    def next_time(self):
+        return self.entries[0][0] if self.entries else None
+
+    def save(self, path=SCHEDULE_PATH):
+        data = {'version': SCHEDULE_VERSION, 'entries': [list(entry) for entry in self.entries]}
+        write_atomic(path, json.dumps(data, separators=(',', ':')).encode('utf-8'))
+
+    @classmethod
+    def load(cls, path=SCHEDULE_PATH):
+        with open(path, 'r', encoding='utf-8') as file:
+            data = json.load(file)
+        if data.get('version') != SCHEDULE_VERSION:
+            raise ValueError(f"Unsupported drop schedule version: {data.get('version')}")
+        return cls(data['entries'])
+
+
+def read_catalog(csv_path):
+    with open(csv_path, 'r', encoding='utf-8', newline='') as file:
+        reader = csv.DictReader(file)
+        return reader.fieldnames, list(reader)
+
+
+def write_catalog(csv_path, fieldnames, rows):
+    with publish_catalog(csv_path) as file:
+        writer = csv.DictWriter(file, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def build_schedule(csv_path):
+    _, rows = read_catalog(csv_path)
+    entries = []
+    for row in rows:
+        entries.extend(pending_transitions(row))
+    return DropSchedule(entries)
+
+
+def apply_due(schedule, csv_path, now):
+    """
+    Apply launches due by `now`. Returns (launched, events): (sku, row) for
+    each launch applied and (time, sku, kind) for each read-only event that
+    came due. The CSV is only rewritten when something launched. A due
+    launch whose row was edited since it was scheduled is rescheduled from
+    the row's current values instead of being dropped.
+    """
+    due = schedule.pop_due(now)
+    events = [(when, sku, kind) for when, sku, kind, _ in due if kind in EVENT_KINDS]
+    launches = {}
+    for _, sku, kind, source in due:
+        if kind == 'launch':
+            launches[sku] = source
+    if not launches:
+        return [], events
+
+    # Lock across read and publish so a concurrent writer's changes are not lost
+    with writer_lock(csv_path):
+        fieldnames, rows = read_catalog(csv_path)
+        launched = []
+        for row in rows:
+            sku = row.get('sku')
+            if sku not in launches:
+                continue
+            if still_pending(row, launches[sku]):
+                apply_launch(row, now)
+                launched.append((sku, row))
+            # Queue whatever the row now waits on: a moved drop_date, or the
+            # new-release window a launch just started
+            schedule.update_row(row, after=now)
+
+        if launched:
+            write_catalog(csv_path, fieldnames, rows)
+    return launched, events
+
+
+def find_row(csv_path, sku):
+    _, rows = read_catalog(csv_path)
+    return next((row for row in rows if row.get('sku') == sku), None)
+
+
+def launch_notice(row):
+    """Payload for /api/email/notify-drop, as built by app/api/scheduler/route.ts"""
+    images = [image.strip() for image in (row.get('images') or '').split(',') if image.strip()]
+    try:
+        price = float(row.get('price') or 0)
+    except ValueError:
+        price = 0
+    return {
+        'productName': row.get('title', ''),
+        'productImage': images[0] if images else '',
+        'productPrice': price,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build and apply the drop-schedule timeline')
+    parser.add_argument('--schedule', default=SCHEDULE_PATH, help='schedule file path')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    build = commands.add_parser('build', help='index pending transitions from a CSV')
+    build.add_argument('--csv', default='export.csv')
+
+    due = commands.add_parser('due', help='list transitions due before a time')
+    due.add_argument('--before', help='ISO time (default: now)')
+
+    apply = commands.add_parser('apply', help='launch products that are due and report events')
+    apply.add_argument('--csv', default='export.csv')
+    apply.add_argument('--now', help='ISO time (default: now)')
+    apply.add_argument('--json', action='store_true', help='print launches and events as JSON')
+
+    update = commands.add_parser('update', help='reschedule one SKU from a CSV')
+    update.add_argument('sku')
+    update.add_argument('--csv', default='export.csv')
+
+    remove = commands.add_parser('remove', help='drop one SKU from the schedule')
+    remove.add_argument('sku')
+
+    args = parser.parse_args()
+
+    moment = getattr(args, 'before', None) or getattr(args, 'now', None)
+    if moment is not None and parse_time(moment) is None:
+        parser.error(f"not an ISO date/time: {moment}")
+
+    if args.command == 'build':
+        schedule = build_schedule(args.csv)
+        schedule.save(args.schedule)
+        print(f"Scheduled {len(schedule)} pending transition(s) into {args.schedule}")
+        return 0
+
+    try:
+        schedule = DropSchedule.load(args.schedule)
+    except FileNotFoundError:
+        raise SystemExit(f"No schedule at {args.schedule}; run `python3 build_drop_schedule.py build` first")
+
+    if args.command == 'due':
+        before = parse_time(args.before) if args.before else datetime.now().timestamp()
+        entries = schedule.due(before)
+        for when, sku, kind, _ in entries:
+            print(f"{to_iso(when)}  {kind:<10}  {sku}")
+        print(f"{len(entries)} transition(s) due")
+
+    elif args.command == 'apply':
+        now = parse_time(args.now) if args.now else datetime.now().timestamp()
+        launched, events = apply_due(schedule, args.csv, now)
+        schedule.save(args.schedule)
+        next_time = schedule.next_time()
+
+        if args.json:
+            result = {
+                'launches': [dict(launch_notice(row), sku=sku) for sku, row in launched],
+                'events': [{'sku': sku, 'kind': kind, 'at': to_iso(when)} for when, sku, kind in events],
+                'next_due': to_iso(next_time) if next_time is not None else None,
+            }
+            print(json.dumps(result))
+            return 0
+
+        for sku, _ in launched:
+            print(f"Launched {sku}")
+        for when, sku, kind in events:
+            print(f"{to_iso(when)}  {kind:<10}  {sku}")
+        print(f"Launched {len(launched)} product(s), {len(events)} event(s) passed; next due "
+              f"{to_iso(next_time) if next_time is not None else 'never'}")
+
+    elif args.command == 'update':
+        row = find_row(args.csv, args.sku)
+        if row is None:
+            schedule.remove_sku(args.sku)
+            print(f"SKU {args.sku} not found in {args.csv}; removed from the schedule")
+        else:
+            now = datetime.now().timestamp()
+            schedule.update_row(row, after=now)
+            print(f"Rescheduled {args.sku}: {len(pending_transitions(row, now))} pending transition(s)")
+        schedule.save(args.schedule)
+
+    elif args.command == 'remove':
+        removed = schedule.remove_sku(args.sku)
+        schedule.save(args.schedule)
+        print(f"Removed {removed} pending transition(s) for {args.sku}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
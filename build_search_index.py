@@ -0,0 +1,570 @@
+#!/usr/bin/env python3
+"""
+Full-text search index over catalog titles and descriptions.
+
+Builds an inverted index (with prefix and trigram lookup) from export.csv,
+scores matches with BM25 and saves everything to a gzipped JSON file that
+can be reloaded and updated one SKU at a time.
+
+Usage:
+    python3 build_search_index.py build [--csv export.csv]
+    python3 build_search_index.py query "labubu crystal" [--limit 10]
+    python3 build_search_index.py update IF_FACE0CEA [--csv export.csv]
+    python3 build_search_index.py remove IF_FACE0CEA
+    python3 build_search_index.py serve [--csv export.csv]
+
+Pass --index PATH before the command to use a file other than search_index.json.gz.
+
+Loading the index costs far more than a query, so `serve` keeps it in
+memory and answers one JSON request per stdin line with one JSON line on
+stdout:
+
+    {"query": "labubu crystal", "limit": 10}  -> {"results": [{"sku": ..., "score": ...}], "ms": 0.4}
+    {"update": "IF_FACE0CEA"}                 -> {"ok": true}  (re-read from --csv)
+    {"remove": "IF_FACE0CEA"}                 -> {"ok": true}
+    {"save": true}                            -> {"ok": true}  (write updates back to --index)
+"""
+
+import argparse
+import bisect
+import csv
+import gzip
+import heapq
+import json
+import math
+import operator
+import re
+import sys
+import time
+import unicodedata
+from collections import Counter, defaultdict
+from itertools import repeat
+
+from catalog_publish import write_atomic
+
+INDEX_PATH = 'search_index.json.gz'
+INDEX_VERSION = 1
+
+# BM25 tuning
+K1 = 1.2
+B = 0.75
+
+# Title words count this many times as often as description words
+TITLE_WEIGHT = 3
+
+# Cached BM25 impacts bake in the average document length; rebuild them
+# once it has drifted by more than this fraction through per-SKU updates
+IMPACT_DRIFT = 0.05
+
+# Keep prefix / fuzzy expansion bounded so short queries stay fast
+MAX_PREFIX_TERMS = 50
+MAX_FUZZY_TERMS = 10
+NGRAM_SIZE = 3
+
+# Multi-word queries intersect postings (rarest word first) before scoring,
+# unless even the rarest word is in more docs than this; candidate sets up
+# to DIRECT_SCORE_DOCS are scored outright instead of in impact order
+MAX_INTERSECT_DOCS = 50000
+DIRECT_SCORE_DOCS = 2000
+
+TOKEN_RE = re.compile(r'[^\W_]+')
+
+
+def normalize(text):
+    """Fold case, width (e.g. the narrow no-break space in "POP\u202fMART") and accents"""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return text.casefold()
+
+
+def tokenize(text):
+    # TOKEN_RE keeps letters and digits only, so punctuation like '–' and '×' splits words
+    return TOKEN_RE.findall(normalize(text))
+
+
+def ngrams(term):
+    padded = f'^{term}$'
+    if len(padded) <= NGRAM_SIZE:
+        return {padded}
+    return {padded[i:i + NGRAM_SIZE] for i in range(len(padded) - NGRAM_SIZE + 1)}
+
+
+class SearchIndex:
+    def __init__(self):
+        self.doc_skus = []          # doc id -> sku (None once removed)
+        self.doc_lengths = []       # doc id -> weighted token count
+        self.doc_terms = []         # doc id -> {term: tf}, needed to undo a doc on update
+        self.sku_to_doc = {}
+        self.postings = defaultdict(dict)  # term -> {doc id: tf}
+        self.total_length = 0
+        self._sorted_terms = None
+        self._ngram_index = None
+        self._impacts = {}          # term -> {doc id: BM25 tf component}
+        self._ranked = {}           # term -> [(impact, doc id)], highest impact first
+        self._impact_avg_length = None
+
+    # ---- building -------------------------------------------------------
+
+    def _term_frequencies(self, title, description):
+        tf = Counter(tokenize(description))
+        for term in tokenize(title):
+            tf[term] += TITLE_WEIGHT
+        return tf
+
+    def add_document(self, sku, title, description):
+        if sku in self.sku_to_doc:
+            self.remove_document(sku)
+
+        tf = self._term_frequencies(title, description)
+        doc_id = len(self.doc_skus)
+        length = sum(tf.values())
+
+        self.doc_skus.append(sku)
+        self.doc_lengths.append(length)
+        self.doc_terms.append(dict(tf))
+        self.sku_to_doc[sku] = doc_id
+        self.total_length += length
+
+        for term, count in tf.items():
+            if term not in self.postings:
+                self._invalidate_vocabulary()
+            self.postings[term][doc_id] = count
+            self._invalidate_impacts(term)
+
+    def remove_document(self, sku):
+        doc_id = self.sku_to_doc.pop(sku, None)
+        if doc_id is None:
+            return False
+
+        for term in self.doc_terms[doc_id]:
+            docs = self.postings[term]
+            docs.pop(doc_id, None)
+            self._invalidate_impacts(term)
+            if not docs:
+                del self.postings[term]
+                self._invalidate_vocabulary()
+
+        self.total_length -= self.doc_lengths[doc_id]
+        self.doc_skus[doc_id] = None
+        self.doc_lengths[doc_id] = 0
+        self.doc_terms[doc_id] = {}
+        return True
+
+    def _invalidate_vocabulary(self):
+        self._sorted_terms = None
+        self._ngram_index = None
+
+    def _invalidate_impacts(self, term):
+        self._impacts.pop(term, None)
+        self._ranked.pop(term, None)
+
+    @property
+    def doc_count(self):
+        return len(self.sku_to_doc)
+
+    # ---- term lookup ----------------------------------------------------
+
+    def _terms(self):
+        if self._sorted_terms is None:
+            self._sorted_terms = sorted(self.postings)
+        return self._sorted_terms
+
+    def _ngrams(self):
+        if self._ngram_index is None:
+            index = defaultdict(list)
+            for term in self._terms():
+                for gram in ngrams(term):
+                    index[gram].append(term)
+            self._ngram_index = index
+        return self._ngram_index
+
+    def prefix_terms(self, prefix):
+        terms = self._terms()
+        start = bisect.bisect_left(terms, prefix)
+        matches = []
+        for term in terms[start:start + MAX_PREFIX_TERMS]:
+            if not term.startswith(prefix):
+                break
+            matches.append(term)
+        return matches
+
+    def fuzzy_terms(self, token):
+        """Closest vocabulary terms by trigram overlap (Jaccard), for typos and infixes"""
+        grams = ngrams(token)
+        overlap = Counter()
+        for gram in grams:
+            for term in self._ngrams().get(gram, ()):
+                overlap[term] += 1
+
+        scored = []
+        for term, shared in overlap.items():
+            similarity = shared / (len(grams) + len(ngrams(term)) - shared)
+            if similarity >= 0.3:
+                scored.append((similarity, term))
+        return [term for _, term in heapq.nlargest(MAX_FUZZY_TERMS, scored)]
+
+    def expand(self, token, is_last):
+        if token in self.postings:
+            terms = [token]
+            # The last word may still be mid-typing ("labubu cry")
+            if is_last:
+                terms += [t for t in self.prefix_terms(token) if t != token]
+            return terms
+        if is_last:
+            terms = self.prefix_terms(token)
+            if terms:
+                return terms
+        return self.fuzzy_terms(token)
+
+    # ---- scoring --------------------------------------------------------
+
+    def idf(self, term):
+        df = len(self.postings.get(term, ()))
+        n = self.doc_count
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def _check_impact_stats(self):
+        avg_length = self.total_length / self.doc_count
+        cached = self._impact_avg_length
+        if cached is None or abs(avg_length - cached) > IMPACT_DRIFT * cached:
+            self._impacts.clear()
+            self._ranked.clear()
+            self._impact_avg_length = avg_length
+
+    def _term_impacts(self, term):
+        """BM25 tf component of term for each doc; also fills the impact-ordered list"""
+        impacts = self._impacts.get(term)
+        if impacts is None:
+            avg_length = self._impact_avg_length
+            impacts = {}
+            for doc_id, tf in self.postings[term].items():
+                norm = K1 * (1 - B + B * self.doc_lengths[doc_id] / avg_length)
+                impacts[doc_id] = tf * (K1 + 1) / (tf + norm)
+            self._impacts[term] = impacts
+            self._ranked[term] = sorted(((impact, doc_id) for doc_id, impact in impacts.items()),
+                                        reverse=True)
+        return impacts
+
+    def warm(self):
+        """Precompute impact-ordered postings for every term, for long-lived processes"""
+        if self.doc_count:
+            self._check_impact_stats()
+            for term in self.postings:
+                self._term_impacts(term)
+
+    def _groups(self, tokens):
+        """One [(term, weight)] group per query word: the word plus its prefix / fuzzy expansions"""
+        groups = []
+        for position, token in enumerate(tokens):
+            group = []
+            for term in self.expand(token, position == len(tokens) - 1):
+                self._term_impacts(term)
+                # Expanded (prefix / fuzzy) terms rank below exact hits
+                group.append((term, self.idf(term) * (1.0 if term == token else 0.5)))
+            if group:
+                groups.append(group)
+        return groups
+
+    def _stream(self, term, weight):
+        """A term's docs in descending score contribution, as (contribution, doc id)"""
+        return ((weight * impact, doc_id) for impact, doc_id in self._ranked[term])
+
+    def _scorers(self, groups):
+        """Per group, the (impact dicts, weights) that _score() looks a doc up in"""
+        return [(tuple(self._impacts[term] for term, _ in group), tuple(weight for _, weight in group))
+                for group in groups]
+
+    @staticmethod
+    def _score(scorers, doc_id):
+        """(number of groups matched, BM25 score) for doc_id"""
+        matched = 0
+        score = 0.0
+        for impacts, weights in scorers:
+            # map() keeps the per-term lookups in C; prefix groups can hold dozens of terms
+            contribution = sum(map(operator.mul, weights, map(dict.get, impacts, repeat(doc_id), repeat(0.0))))
+            if contribution:
+                matched += 1
+                score += contribution
+        return matched, score
+
+    def _candidates(self, groups):
+        """
+        Docs matching every group, intersecting from the rarest group (groups
+        are sorted by document frequency). None when the rarest group is too
+        common for intersecting up front to pay off.
+        """
+        candidates = None
+        for group in groups:
+            if candidates is None:
+                if len(group) == 1:
+                    candidates = self.postings[group[0][0]].keys()
+                else:
+                    candidates = set().union(*(self.postings[term] for term, _ in group))
+                if len(candidates) > MAX_INTERSECT_DOCS:
+                    return None
+                continue
+            matched = set()
+            for term, _ in group:
+                # keys() & set walks the smaller side in C
+                matched |= self.postings[term].keys() & candidates
+            candidates = matched
+            if not candidates:
+                break
+        return set(candidates)
+
+    def _top_k(self, groups, limit, min_matched, exclude=(), candidates=None):
+        """
+        Threshold-algorithm top-k over docs matching at least `min_matched`
+        groups. Every term's postings are read in descending contribution,
+        round-robin, and a doc is fully scored the first time it is seen. The
+        scan stops as soon as the k-th best score is at least the sum of the
+        current contributions, which bounds any doc not yet seen.
+
+        When every group must match, the scan also stops once all terms of
+        any one group have run out, since every doc that matches all groups
+        has been seen by then. When `candidates` is given, other docs are
+        skipped without scoring and the scan ends once every candidate has
+        been seen.
+        """
+        scorers = self._scorers(groups)
+        streams = []
+        for group_number, group in enumerate(groups):
+            for term, weight in group:
+                streams.append((group_number, self._stream(term, weight)))
+        bounds = [math.inf] * len(streams)
+        live_terms = [len(group) for group in groups]
+        conjunctive = min_matched == len(groups)
+        seen = set(exclude)
+        heap = []
+        remaining = len(candidates) if candidates is not None else 0
+
+        while True:
+            for i, (group_number, stream) in enumerate(streams):
+                if not bounds[i]:
+                    continue
+                item = next(stream, None)
+                if item is None:
+                    bounds[i] = 0
+                    live_terms[group_number] -= 1
+                    if conjunctive and not live_terms[group_number]:
+                        return sorted(heap, reverse=True)
+                    continue
+                bounds[i], doc_id = item
+                if doc_id in seen:
+                    continue
+                seen.add(doc_id)
+                if candidates is not None:
+                    if doc_id not in candidates:
+                        continue
+                    remaining -= 1
+
+                matched, score = self._score(scorers, doc_id)
+                if matched >= min_matched:
+                    if len(heap) < limit:
+                        heapq.heappush(heap, (score, doc_id))
+                    elif score > heap[0][0]:
+                        heapq.heapreplace(heap, (score, doc_id))
+                if candidates is not None and not remaining:
+                    return sorted(heap, reverse=True)
+
+            if not any(bounds):
+                break
+            if len(heap) == limit and heap[0][0] >= sum(bounds):
+                break
+        return sorted(heap, reverse=True)
+
+    def search(self, query, limit=10):
+        tokens = tokenize(query)
+        if not tokens or not self.doc_count or limit <= 0:
+            return []
+
+        self._check_impact_stats()
+        groups = self._groups(tokens)
+        if not groups:
+            return []
+        # Rarest word first: its postings are shortest and drive the intersection
+        groups.sort(key=lambda group: sum(len(self.postings[term]) for term, _ in group))
+
+        # Docs matching every query word come first, then docs matching one
+        # word fewer, and so on, each by score
+        candidates = self._candidates(groups) if len(groups) > 1 else None
+        if candidates is not None and len(candidates) <= DIRECT_SCORE_DOCS:
+            scorers = self._scorers(groups)
+            ranked = heapq.nlargest(limit, ((self._score(scorers, doc_id)[1], doc_id)
+                                            for doc_id in candidates))
+        else:
+            ranked = self._top_k(groups, limit, len(groups), candidates=candidates)
+        for min_matched in range(len(groups) - 1, 0, -1):
+            if len(ranked) >= limit:
+                break
+            ranked += self._top_k(groups, limit - len(ranked), min_matched,
+                                  exclude={doc_id for _, doc_id in ranked})
+        return [(self.doc_skus[doc_id], round(score, 4)) for score, doc_id in ranked]
+
+    # ---- persistence ----------------------------------------------------
+
+    def to_dict(self):
+        # Compact doc ids so removed slots are not written out
+        live = [doc_id for doc_id, sku in enumerate(self.doc_skus) if sku is not None]
+        remap = {old: new for new, old in enumerate(live)}
+
+        postings = {}
+        for term, docs in self.postings.items():
+            flat = []
+            for doc_id in sorted(docs):
+                flat.extend((remap[doc_id], docs[doc_id]))
+            postings[term] = flat
+
+        return {
+            'version': INDEX_VERSION,
+            'skus': [self.doc_skus[d] for d in live],
+            'lengths': [self.doc_lengths[d] for d in live],
+            'postings': postings,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get('version') != INDEX_VERSION:
+            raise ValueError(f"Unsupported search index version: {data.get('version')}")
+
+        index = cls()
+        index.doc_skus = list(data['skus'])
+        index.doc_lengths = list(data['lengths'])
+        index.doc_terms = [{} for _ in index.doc_skus]
+        index.sku_to_doc = {sku: doc_id for doc_id, sku in enumerate(index.doc_skus)}
+        index.total_length = sum(index.doc_lengths)
+
+        for term, flat in data['postings'].items():
+            docs = index.postings[term]
+            for i in range(0, len(flat), 2):
+                doc_id, tf = flat[i], flat[i + 1]
+                docs[doc_id] = tf
+                index.doc_terms[doc_id][term] = tf
+        return index
+
+    def save(self, path=INDEX_PATH):
+        # Replaced atomically so a concurrent load never reads a cut-off gzip
+        data = json.dumps(self.to_dict(), separators=(',', ':'), ensure_ascii=False)
+        write_atomic(path, gzip.compress(data.encode('utf-8')))
+
+    @classmethod
+    def load(cls, path=INDEX_PATH):
+        with gzip.open(path, 'rt', encoding='utf-8') as file:
+            return cls.from_dict(json.load(file))
+
+
+def read_catalog(csv_path):
+    with open(csv_path, 'r', encoding='utf-8', newline='') as file:
+        return [row for row in csv.DictReader(file) if row.get('sku')]
+
+
+def build_index(csv_path):
+    index = SearchIndex()
+    for row in read_catalog(csv_path):
+        index.add_document(row['sku'], row.get('title', ''), row.get('description', ''))
+    return index
+
+
+def handle_request(index, request, index_path, csv_path):
+    """Answer one `serve` request"""
+    if 'query' in request:
+        start = time.perf_counter()
+        results = index.search(request['query'], int(request.get('limit', 10)))
+        elapsed = (time.perf_counter() - start) * 1000
+        return {'results': [{'sku': sku, 'score': score} for sku, score in results], 'ms': round(elapsed, 3)}
+    if 'update' in request:
+        row = next((r for r in read_catalog(csv_path) if r['sku'] == request['update']), None)
+        if row is None:
+            return {'error': f"SKU {request['update']} not found in {csv_path}"}
+        index.add_document(row['sku'], row.get('title', ''), row.get('description', ''))
+        return {'ok': True}
+    if 'remove' in request:
+        if not index.remove_document(request['remove']):
+            return {'error': f"SKU {request['remove']} is not in the index"}
+        return {'ok': True}
+    if request.get('save'):
+        index.save(index_path)
+        return {'ok': True}
+    return {'error': 'expected one of query, update, remove, save'}
+
+
+def serve(index_path, csv_path):
+    index = SearchIndex.load(index_path)
+    index.warm()
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError('request must be a JSON object')
+            response = handle_request(index, request, index_path, csv_path)
+        except (ValueError, TypeError, AttributeError) as error:
+            response = {'error': str(error)}
+        print(json.dumps(response, ensure_ascii=False), flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build and query the catalog search index')
+    parser.add_argument('--index', default=INDEX_PATH, help='index file path')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    build = commands.add_parser('build', help='index every product in a CSV')
+    build.add_argument('--csv', default='export.csv')
+
+    query = commands.add_parser('query', help='search the index')
+    query.add_argument('text')
+    query.add_argument('--limit', type=int, default=10)
+
+    update = commands.add_parser('update', help='re-index one SKU from a CSV')
+    update.add_argument('sku')
+    update.add_argument('--csv', default='export.csv')
+
+    remove = commands.add_parser('remove', help='drop one SKU from the index')
+    remove.add_argument('sku')
+
+    serve_cmd = commands.add_parser('serve', help='answer JSON-lines requests on stdin from an in-memory index')
+    serve_cmd.add_argument('--csv', default='export.csv')
+
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        index = build_index(args.csv)
+        index.save(args.index)
+        print(f"Indexed {index.doc_count} products ({len(index.postings)} terms) into {args.index}")
+
+    elif args.command == 'query':
+        index = SearchIndex.load(args.index)
+        start = time.perf_counter()
+        results = index.search(args.text, args.limit)
+        elapsed = (time.perf_counter() - start) * 1000
+        for sku, score in results:
+            print(f"{score:>8.3f}  {sku}")
+        print(f"{len(results)} result(s) in {elapsed:.3f} ms")
+
+    elif args.command == 'update':
+        index = SearchIndex.load(args.index)
+        row = next((r for r in read_catalog(args.csv) if r['sku'] == args.sku), None)
+        if row is None:
+            print(f"SKU {args.sku} not found in {args.csv}")
+            return 1
+        index.add_document(row['sku'], row.get('title', ''), row.get('description', ''))
+        index.save(args.index)
+        print(f"Re-indexed {args.sku}")
+
+    elif args.command == 'remove':
+        index = SearchIndex.load(args.index)
+        if not index.remove_document(args.sku):
+            print(f"SKU {args.sku} is not in the index")
+            return 1
+        index.save(args.index)
+        print(f"Removed {args.sku} from the index")
+
+    elif args.command == 'serve':
+        serve(args.index, args.csv)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
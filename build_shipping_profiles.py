@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Precompute a shipping profile for every SKU in export.csv.
+
+For each product this works out the billable weight (the larger of actual
+and dimensional weight), a package size class and which service tiers from
+lib/shipping.ts can carry it, so checkout can look the answer up instead of
+recomputing it per cart. Products with identical (weight, length, width,
+height) share one computed profile, and the output stores each distinct
+profile once:
+
+    {
+      "version": 3,
+      "profiles": [{"billable_weight": 2.0, "size_class": "small", "services": {...}, ...}],
+      "skus": {"IF_9223B4D0": 0, ...}
+    }
+
+SKUs missing weight or dimensions are flagged; their billable weight falls
+back to the same 0.5 lb default as calculateCartWeight(). For flagged SKUs
+"services" is left empty and the guess goes in "provisional_services"
+instead.
+
+The table is replaced atomically, so checkout can read it while a build runs.
+
+Usage:
+    python3 build_shipping_profiles.py [--csv export.csv] [--out shipping_profiles.json] [--strict]
+
+--strict exits with status 1 when any SKU is missing shipping data.
+"""
+
+import argparse
+import csv
+import json
+import sys
+
+from catalog_publish import write_atomic
+
+PROFILES_PATH = 'shipping_profiles.json'
+PROFILES_VERSION = 3
+
+# Same fallback as calculateCartWeight() in lib/shipping.ts
+DEFAULT_WEIGHT = 0.5  # lbs
+
+# USPS dimensional weight: cubic inches / 166, only for packages over one cubic foot
+DIM_DIVISOR = 166
+DIM_MIN_VOLUME = 1728  # cubic inches
+
+# USPS size limits on length (longest side) + girth, in inches
+MAX_STANDARD_LENGTH_GIRTH = 108
+MAX_OVERSIZE_LENGTH_GIRTH = 130  # Ground Advantage only
+
+# Per-zone services and weight limits from SHIPPING_ZONES in lib/shipping.ts
+SERVICE_MAX_WEIGHT = {
+    'US': {'ground_advantage': 70, 'priority': 70, 'express': 70},
+    'CA': {'first_class_intl': 4, 'priority_intl': 70, 'express_intl': 70},
+    'INTERNATIONAL': {'first_class_intl': 4, 'priority_intl': 70, 'express_intl': 70},
+}
+OVERSIZE_SERVICES = {'ground_advantage'}
+
+SHIPPING_FIELDS = ('weight', 'length', 'width', 'height')
+
+
+def parse_measure(value):
+    """Positive float, or None when blank, unparseable or zero"""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if number > 0 else None
+
+
+def compute_profile(weight, length, width, height):
+    """Shipping profile for one dimension tuple; any value may be None when missing"""
+    actual = weight if weight is not None else DEFAULT_WEIGHT
+
+    has_dimensions = None not in (length, width, height)
+    dim_weight = None
+    length_girth = None
+    if has_dimensions:
+        volume = length * width * height
+        if volume > DIM_MIN_VOLUME:
+            dim_weight = round(volume / DIM_DIVISOR, 2)
+        sides = sorted((length, width, height), reverse=True)
+        length_girth = sides[0] + 2 * (sides[1] + sides[2])
+
+    billable = round(max(actual, dim_weight or 0), 2)
+
+    if length_girth is None:
+        size_class = 'unknown'
+    elif length_girth > MAX_OVERSIZE_LENGTH_GIRTH:
+        size_class = 'unshippable'
+    elif length_girth > MAX_STANDARD_LENGTH_GIRTH:
+        size_class = 'oversize'
+    elif dim_weight is not None:
+        size_class = 'large'
+    else:
+        size_class = 'small'
+
+    services = {}
+    for zone, limits in SERVICE_MAX_WEIGHT.items():
+        eligible = []
+        for service, max_weight in limits.items():
+            if billable > max_weight or size_class == 'unshippable':
+                continue
+            if size_class == 'oversize' and service not in OVERSIZE_SERVICES:
+                continue
+            eligible.append(service)
+        services[zone] = eligible
+
+    missing = [field for field, value in zip(SHIPPING_FIELDS, (weight, length, width, height))
+               if value is None]
+
+    # With any measurement missing eligibility is only a guess, so it is kept
+    # apart and checkout can decide whether to offer those tiers
+    provisional_services = {}
+    if missing:
+        provisional_services = services
+        services = {zone: [] for zone in SERVICE_MAX_WEIGHT}
+
+    return {
+        'billable_weight': billable,
+        'actual_weight': actual,
+        'dim_weight': dim_weight,
+        'size_class': size_class,
+        'services': services,
+        'provisional_services': provisional_services,
+        'missing': missing,
+    }
+
+
+def build_profiles(csv_path):
+    """Returns (lookup table, list of (sku, missing fields) for flagged SKUs)"""
+    with open(csv_path, 'r', encoding='utf-8', newline='') as file:
+        rows = [row for row in csv.DictReader(file) if row.get('sku')]
+
+    profiles = []
+    profile_index = {}
+    skus = {}
+    flagged = []
+
+    for row in rows:
+        key = tuple(parse_measure(row.get(field)) for field in SHIPPING_FIELDS)
+        # Identical dimension tuples share one computed profile
+        if key not in profile_index:
+            profile_index[key] = len(profiles)
+            profiles.append(compute_profile(*key))
+        skus[row['sku']] = profile_index[key]
+
+        missing = profiles[profile_index[key]]['missing']
+        if missing:
+            flagged.append((row['sku'], missing))
+
+    table = {'version': PROFILES_VERSION, 'profiles': profiles, 'skus': skus}
+    return table, flagged
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Precompute per-SKU shipping profiles')
+    parser.add_argument('--csv', default='export.csv')
+    parser.add_argument('--out', default=PROFILES_PATH)
+    parser.add_argument('--strict', action='store_true', help='fail if any SKU is missing shipping data')
+    args = parser.parse_args()
+
+    table, flagged = build_profiles(args.csv)
+
+    write_atomic(args.out, json.dumps(table, separators=(',', ':')).encode('utf-8'))
+
+    for sku, missing in flagged:
+        print(f"⚠️  {sku}: missing {', '.join(missing)}")
+    print(f"Wrote {len(table['skus'])} SKU(s) sharing {len(table['profiles'])} profile(s) to {args.out}")
+
+    if flagged:
+        print(f"{len(flagged)} SKU(s) missing shipping data")
+        if args.strict:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Generation-based atomic publishing for export.csv.
+
+Writers never modify export.csv in place. Each publish writes a complete,
+read-only generation under catalog_generations/ (export.000001.csv,
+export.000002.csv, ...), records it in catalog_generations/CURRENT.export and then
+installs a copy over export.csv with an atomic rename. Readers (the Next.js
+API routes) keep opening export.csv without any lock and always get either
+the previous or the new catalog, never a truncated one. export.csv stays a
+regular file, so git only ever sees content changes. The generations
+directory is untracked and only serves as history and rollback source.
+
+The Node writers of export.csv go through writeCatalogFile() in
+lib/catalog-file.ts (writeCatalogFileSync() in utils/catalog-file.js for
+scripts), which does the same temp-file-and-rename. They do not take the
+advisory lock below, so they can still race a Python writer, and they do
+not create a generation. When export.csv no longer matches CURRENT, `status`
+says so, `restore` refuses without --force, and the next Python publish
+first records the file as it is as its own generation.
+
+Python writers serialize through an advisory flock on
+catalog_generations/.lock. Hold writer_lock() around a read-modify-write
+so no update is lost:
+
+    with writer_lock('export.csv'):
+        rows = read ...
+        with publish_catalog('export.csv') as file:
+            csv.writer(file).writerows(rows)
+
+If catalog_shards/ has been built from this catalog, it is re-synced after
+every publish (see shard_catalog.py).
+
+Only the newest KEEP_GENERATIONS generations are kept, plus any superseded
+less than GC_GRACE_SECONDS ago.
+
+An earlier version of this tool turned export.csv into a symlink. The next
+publish replaces that link with a regular file. To fix a checkout by hand,
+run `python3 catalog_publish.py restore`.
+
+Usage:
+    python3 catalog_publish.py status [--csv export.csv]
+    python3 catalog_publish.py gc [--csv export.csv] [--keep 3] [--grace 60]
+    python3 catalog_publish.py restore [--csv export.csv] [--generation N] [--force]
+"""
+
+import argparse
+import fcntl
+import filecmp
+import os
+import re
+import stat
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+CATALOG_PATH = 'export.csv'
+GENERATIONS_DIR = 'catalog_generations'
+POINTER_NAME = 'CURRENT'
+KEEP_GENERATIONS = 3
+
+# Superseded generations stay around this long so a bad publish can be rolled back
+GC_GRACE_SECONDS = 60
+
+# (abspath of target, thread id) -> [lock file object, depth], so writer_lock()
+# is re-entrant within a thread; other threads open their own lock file and block
+_held_locks = {}
+
+
+def generations_dir(target):
+    return os.path.join(os.path.dirname(os.path.abspath(target)), GENERATIONS_DIR)
+
+
+def _generation_pattern(target):
+    stem, ext = os.path.splitext(os.path.basename(target))
+    return re.compile(rf'^{re.escape(stem)}\.(\d+){re.escape(ext)}$')
+
+
+def list_generations(target):
+    """(number, path) for every generation of target, oldest first"""
+    directory = generations_dir(target)
+    if not os.path.isdir(directory):
+        return []
+    pattern = _generation_pattern(target)
+    found = []
+    for name in os.listdir(directory):
+        match = pattern.match(name)
+        if match:
+            found.append((int(match.group(1)), os.path.join(directory, name)))
+    return sorted(found)
+
+
+def _pointer_path(target):
+    stem, _ = os.path.splitext(os.path.basename(target))
+    return os.path.join(generations_dir(target), f'{POINTER_NAME}.{stem}')
+
+
+def current_generation(target):
+    """Path of the generation last installed as target, or None if nothing was published"""
+    try:
+        with open(_pointer_path(target), 'r', encoding='utf-8') as file:
+            name = file.read().strip()
+    except FileNotFoundError:
+        return None
+    return os.path.join(generations_dir(target), name) if name else None
+
+
+def matches_current(target):
+    """
+    Whether target still holds the CURRENT generation; False after a Node
+    writer replaced it, None when nothing has been published yet
+    """
+    live = current_generation(target)
+    if live is None or not os.path.exists(live):
+        return None
+    return os.path.exists(target) and filecmp.cmp(target, live, shallow=False)
+
+
+def _fsync_dir(directory):
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def write_atomic(path, data):
+    """Replace path with bytes `data` via a temp file and rename; readers see old or new, never partial"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=f'.{os.path.basename(path)}-', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    _fsync_dir(directory)
+
+
+@contextmanager
+def writer_lock(target=CATALOG_PATH):
+    """Advisory exclusive lock shared by every Python writer of target; readers never take it"""
+    key = (os.path.abspath(target), threading.get_ident())
+    held = _held_locks.get(key)
+    if held:
+        held[1] += 1
+        try:
+            yield
+        finally:
+            held[1] -= 1
+        return
+
+    directory = generations_dir(target)
+    os.makedirs(directory, exist_ok=True)
+    lock_file = open(os.path.join(directory, '.lock'), 'a')
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        _held_locks[key] = [lock_file, 1]
+        try:
+            yield
+        finally:
+            del _held_locks[key]
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+    finally:
+        lock_file.close()
+
+
+def _install(target, generation_path):
+    """Copy generation_path over target atomically and point CURRENT at it"""
+    previous = current_generation(target)
+
+    with open(generation_path, 'rb') as source:
+        data = source.read()
+    # Also replaces a symlink left behind by the old layout with a regular file
+    write_atomic(target, data)
+
+    write_atomic(_pointer_path(target), os.path.basename(generation_path).encode('utf-8'))
+
+    # The superseded generation's mtime records when it stopped being live
+    if previous and previous != generation_path and os.path.exists(previous):
+        os.utime(previous)
+
+
+def _sync_shards(target):
+    # Imported here because shard_catalog itself uses write_atomic from this module
+    from shard_catalog import sync_if_built
+    sync_if_built(target)
+
+
+def collect_garbage(target=CATALOG_PATH, keep=KEEP_GENERATIONS, grace=GC_GRACE_SECONDS):
+    """Delete all but the newest `keep` generations; never the live or recently superseded ones"""
+    keep = max(keep, 1)
+    live = current_generation(target)
+    generations = list_generations(target)
+    now = time.time()
+    removed = []
+    for _, path in generations[:max(len(generations) - keep, 0)]:
+        if path == live or now - os.path.getmtime(path) < grace:
+            continue
+        os.remove(path)
+        removed.append(path)
+    return removed
+
+
+def _next_generation_path(target):
+    generations = list_generations(target)
+    number = generations[-1][0] + 1 if generations else 1
+    stem, ext = os.path.splitext(os.path.basename(target))
+    return os.path.join(generations_dir(target), f'{stem}.{number:06d}{ext}')
+
+
+def _record_external_edits(target):
+    """Keep edits made outside this module (Node writers) as a generation of their own"""
+    if matches_current(target) is not False or not os.path.exists(target):
+        return
+    with open(target, 'rb') as file:
+        data = file.read()
+    generation_path = _next_generation_path(target)
+    write_atomic(generation_path, data)
+    os.chmod(generation_path, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+    previous = current_generation(target)
+    write_atomic(_pointer_path(target), os.path.basename(generation_path).encode('utf-8'))
+    if previous and os.path.exists(previous):
+        os.utime(previous)
+
+
+@contextmanager
+def publish_catalog(target=CATALOG_PATH, keep=KEEP_GENERATIONS):
+    """
+    Yield a text file for the next generation of target. On a clean exit it is
+    flushed to disk, made read-only and installed; on an exception nothing is
+    published.
+    """
+    with writer_lock(target):
+        _record_external_edits(target)
+        directory = generations_dir(target)
+        generation_path = _next_generation_path(target)
+        stem, ext = os.path.splitext(os.path.basename(target))
+
+        fd, tmp_path = tempfile.mkstemp(prefix=f'.{stem}-', suffix=ext, dir=directory)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8', newline='') as file:
+                yield file
+                file.flush()
+                os.fsync(file.fileno())
+            os.chmod(tmp_path, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+            os.replace(tmp_path, generation_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+        _install(target, generation_path)
+        collect_garbage(target, keep)
+        _sync_shards(target)
+
+
+def restore(target=CATALOG_PATH, number=None, force=False):
+    """
+    Reinstall a generation (default: the current one) as a regular file at
+    target. Refuses, unless forced, when target holds edits no generation has
+    """
+    with writer_lock(target):
+        if not force and matches_current(target) is False and not os.path.islink(target):
+            raise SystemExit(f"{target} was changed outside catalog_publish.py (e.g. by a Node writer) "
+                             f"and restoring would discard that; pass --force to restore anyway")
+        if number is None:
+            path = current_generation(target)
+            if path is None and os.path.islink(target):
+                path = os.path.realpath(target)
+        else:
+            path = dict(list_generations(target)).get(number)
+        if not path or not os.path.exists(path):
+            raise SystemExit(f"No generation to restore for {target}")
+        _install(target, path)
+        return path
+
+
+def positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError('must be at least 1')
+    return number
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Inspect and clean up catalog generations')
+    parser.add_argument('--csv', default=CATALOG_PATH)
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('status', help='show the live generation and those on disk')
+    gc = commands.add_parser('gc', help='delete old generations')
+    gc.add_argument('--keep', type=positive_int, default=KEEP_GENERATIONS)
+    gc.add_argument('--grace', type=float, default=GC_GRACE_SECONDS, help='seconds')
+    restore_cmd = commands.add_parser('restore', help='reinstall a generation as a regular export.csv')
+    restore_cmd.add_argument('--generation', type=int, help='generation number (default: current)')
+    restore_cmd.add_argument('--force', action='store_true', help='discard edits made outside catalog_publish.py')
+    args = parser.parse_args()
+
+    if args.command == 'status':
+        live = current_generation(args.csv)
+        print(f"{args.csv} <- {live or '(not yet published)'}")
+        if matches_current(args.csv) is False:
+            print(f"⚠️  {args.csv} was changed outside catalog_publish.py since then; "
+                  f"the next publish records it as a new generation")
+        for number, path in list_generations(args.csv):
+            print(f"  {'*' if path == live else ' '} {number:>6}  {os.path.getsize(path):>10,} B  {path}")
+
+    elif args.command == 'gc':
+        with writer_lock(args.csv):
+            removed = collect_garbage(args.csv, args.keep, args.grace)
+        for path in removed:
+            print(f"Removed {path}")
+        print(f"Removed {len(removed)} old generation(s)")
+
+    elif args.command == 'restore':
+        path = restore(args.csv, args.generation, args.force)
+        print(f"Restored {args.csv} from {path}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
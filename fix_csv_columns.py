@@ -2,7 +2,14 @@
 
 import csv
 
+from catalog_publish import publish_catalog, writer_lock
+
 def fix_csv_columns():
+    # Hold the writer lock across read and publish so no other update is lost
+    with writer_lock('export.csv'):
+        _fix_csv_columns()
+
+def _fix_csv_columns():
     # Read the current CSV
     with open('export.csv', 'r', encoding='utf-8') as file:
         reader = csv.reader(file)
@@ -37,8 +44,8 @@ def fix_csv_columns():
             fixed_rows.append(truncated_row)
             print(f"Row {i}: Truncated from {current_columns} to {expected_columns} columns")
     
-    # Write the fixed CSV
-    with open('export.csv', 'w', encoding='utf-8', newline='') as file:
+    # Publish the fixed CSV as a new generation (readers never see a partial file)
+    with publish_catalog('export.csv') as file:
         writer = csv.writer(file)
         writer.writerows(fixed_rows)
     
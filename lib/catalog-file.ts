@@ -0,0 +1,28 @@
+import { promises as fs } from 'fs'
+import path from 'path'
+
+/**
+ * Replace a catalog CSV (export.csv) atomically: write a temp file in the
+ * same directory, then rename it over the target. Readers always see either
+ * the old or the new file, never a truncated one. Mirrors how
+ * catalog_publish.py installs a new generation.
+ */
+export async function writeCatalogFile(filePath: string, content: string): Promise<void> {
+  const dir = path.dirname(filePath)
+  const tmpPath = path.join(dir, `.${path.basename(filePath)}.${process.pid}.${Date.now()}.tmp`)
+
+  const handle = await fs.open(tmpPath, 'w')
+  try {
+    await handle.writeFile(content, 'utf-8')
+    await handle.sync()
+  } finally {
+    await handle.close()
+  }
+
+  try {
+    await fs.rename(tmpPath, filePath)
+  } catch (error) {
+    await fs.unlink(tmpPath).catch(() => {})
+    throw error
+  }
+}
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Lighthouse performance-budget regression tracker.
+
+Ingests Lighthouse JSON reports (like lighthouse-report.report.json) into a
+compact JSON-lines history, checks the latest run against per-metric
+budgets and lists the audits and resources that regressed between runs.
+Resources are keyed by URL without cache-busting parameters (?v=...) or
+content hashes, so rebuilding the same code does not show up as new files.
+
+Usage:
+    python3 lighthouse_budget.py ingest lighthouse-report.report.json [more.json ...]
+    python3 lighthouse_budget.py check [--run -1] [--budgets budgets.json]
+    python3 lighthouse_budget.py diff [--base -2] [--head -1] [--top 10]
+    python3 lighthouse_budget.py history
+
+`check` exits with status 1 when any budget is blown, so it can gate CI.
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+HISTORY_PATH = 'perf_history.jsonl'
+
+# Lighthouse audit id -> short metric name
+METRICS = {
+    'largest-contentful-paint': 'LCP',
+    'total-blocking-time': 'TBT',
+    'interactive': 'TTI',
+    'speed-index': 'SI',
+    'first-contentful-paint': 'FCP',
+    'cumulative-layout-shift': 'CLS',
+}
+
+# Query parameters that only bust caches (Next adds ?v=<timestamp> in dev)
+CACHE_BUSTER_PARAMS = {'v', 'ver', 'version', 't', 'ts', '_'}
+
+# Content hashes in file names: page-1a2b3c4d5e6f7a8b.js, 0f1e2d3c4b5a6978.css
+NAME_HASH_RE = re.compile(r'[-.][0-9a-f]{8,}(?=\.\w+$)')
+HASH_NAME_RE = re.compile(r'^[0-9a-f]{16,}(?=\.\w+$)')
+
+# Same targets as scripts/performance-check.js, plus TBT / Speed Index / score
+DEFAULT_BUDGETS = {
+    'LCP': 2800,   # ms
+    'CLS': 0.06,   # score
+    'FCP': 1800,   # ms
+    'TTI': 3800,   # ms
+    'TBT': 300,    # ms
+    'SI': 3400,    # ms
+    'score': 0.9,  # minimum performance score
+}
+
+
+def resource_key(url):
+    """URL with cache-busting query parameters and content hashes removed, so builds compare"""
+    parts = urlsplit(url)
+    query = urlencode([(name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+                       if name not in CACHE_BUSTER_PARAMS])
+    directory, slash, name = parts.path.rpartition('/')
+    name = HASH_NAME_RE.sub('[hash]', NAME_HASH_RE.sub('', name))
+    return urlunsplit((parts.scheme, parts.netloc, directory + slash + name, query, ''))
+
+
+def run_resources(run):
+    """Transfer size per resource key; also normalizes runs recorded before keys were"""
+    resources = {}
+    for url, size in run['resources'].items():
+        key = resource_key(url)
+        resources[key] = resources.get(key, 0) + size
+    return resources
+
+
+def summarize_report(report):
+    """Reduce a full Lighthouse report to the fields we track over time"""
+    audits = report.get('audits', {})
+
+    metrics = {}
+    for audit_id, name in METRICS.items():
+        value = audits.get(audit_id, {}).get('numericValue')
+        if value is not None:
+            metrics[name] = round(value, 4)
+
+    tracked_audits = {}
+    for audit_id, audit in audits.items():
+        score = audit.get('score')
+        if score is None and audit.get('numericValue') is None:
+            continue
+        tracked_audits[audit_id] = [score, round(audit.get('numericValue') or 0, 2)]
+
+    resources = {}
+    requests = audits.get('network-requests', {}).get('details', {}).get('items', [])
+    for request in requests:
+        url = request.get('url')
+        if url:
+            key = resource_key(url)
+            resources[key] = resources.get(key, 0) + (request.get('transferSize') or 0)
+
+    totals = {}
+    summary = audits.get('resource-summary', {}).get('details', {}).get('items', [])
+    for item in summary:
+        totals[item['resourceType']] = [item.get('requestCount', 0), item.get('transferSize', 0)]
+
+    return {
+        'fetchTime': report.get('fetchTime'),
+        'url': report.get('finalDisplayedUrl') or report.get('finalUrl') or report.get('requestedUrl'),
+        'lighthouseVersion': report.get('lighthouseVersion'),
+        'score': report.get('categories', {}).get('performance', {}).get('score'),
+        'metrics': metrics,
+        'audits': tracked_audits,
+        'resources': resources,
+        'totals': totals,
+    }
+
+
+def load_history(path=HISTORY_PATH):
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def ingest(report_paths, history_path=HISTORY_PATH):
+    history = load_history(history_path)
+    seen = {(run['fetchTime'], run['url']) for run in history}
+
+    added = []
+    for report_path in report_paths:
+        with open(report_path, 'r', encoding='utf-8') as file:
+            run = summarize_report(json.load(file))
+        key = (run['fetchTime'], run['url'])
+        if key in seen:
+            print(f"Skipping {report_path}: run from {run['fetchTime']} already recorded")
+            continue
+        seen.add(key)
+        added.append(run)
+
+    # Keep the history in run order regardless of ingest order
+    history = sorted(history + added, key=lambda run: run['fetchTime'] or '')
+    with open(history_path, 'w', encoding='utf-8') as file:
+        for run in history:
+            file.write(json.dumps(run, separators=(',', ':')) + '\n')
+    return added
+
+
+def check_budgets(run, budgets):
+    """Return a list of (name, actual, budget) for every blown budget"""
+    failures = []
+    for name, budget in budgets.items():
+        if name == 'score':
+            actual = run.get('score')
+            if actual is not None and actual < budget:
+                failures.append((name, actual, budget))
+            continue
+        actual = run['metrics'].get(name)
+        if actual is not None and actual > budget:
+            failures.append((name, actual, budget))
+    return failures
+
+
+def regressing_audits(base, head, top):
+    """
+    Audits that got worse, as (score_drop, relative_rise, audit_id, before, after).
+    Audit values use different units (ms, bytes, counts), so they are only
+    compared as relative change, after score drop.
+    """
+    regressions = []
+    for audit_id, (head_score, head_value) in head['audits'].items():
+        if audit_id not in base['audits']:
+            continue
+        base_score, base_value = base['audits'][audit_id]
+        score_drop = 0
+        if base_score is not None and head_score is not None:
+            score_drop = max(base_score - head_score, 0)
+        relative_rise = 0
+        if head_value > base_value:
+            relative_rise = (head_value - base_value) / base_value if base_value else float('inf')
+        if score_drop > 0 or relative_rise > 0:
+            regressions.append((score_drop, relative_rise, audit_id, base_value, head_value))
+    regressions.sort(reverse=True)
+    return regressions[:top]
+
+
+def regressing_resources(base, head, top):
+    base_resources, head_resources = run_resources(base), run_resources(head)
+    regressions = []
+    for url, size in head_resources.items():
+        delta = size - base_resources.get(url, 0)
+        if delta > 0:
+            regressions.append((delta, url, url not in base_resources))
+    regressions.sort(reverse=True)
+    return regressions[:top]
+
+
+def removed_resources(base, head, top):
+    """Resources in base that head no longer loads, as (size, url), largest first"""
+    head_resources = run_resources(head)
+    removed = [(size, url) for url, size in run_resources(base).items() if url not in head_resources]
+    removed.sort(reverse=True)
+    return removed[:top]
+
+
+def format_metric(name, value):
+    if name in ('CLS', 'score'):
+        return f"{value:.3f}"
+    return f"{value:,.0f} ms"
+
+
+def pick_run(history, index, history_path=HISTORY_PATH):
+    if not history:
+        raise SystemExit(f"No runs recorded in {history_path}; ingest a report first")
+    try:
+        return history[index]
+    except IndexError:
+        raise SystemExit(f"Run {index} not found ({len(history)} run(s) recorded)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Track Lighthouse runs against performance budgets')
+    parser.add_argument('--history', default=HISTORY_PATH, help='history file path')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    ingest_cmd = commands.add_parser('ingest', help='add Lighthouse JSON reports to the history')
+    ingest_cmd.add_argument('reports', nargs='+')
+
+    check_cmd = commands.add_parser('check', help='check a run against budgets')
+    check_cmd.add_argument('--run', type=int, default=-1, help='history index (default: latest)')
+    check_cmd.add_argument('--budgets', help='JSON file overriding DEFAULT_BUDGETS')
+
+    diff_cmd = commands.add_parser('diff', help='top regressing audits and resources between runs')
+    diff_cmd.add_argument('--base', type=int, default=-2)
+    diff_cmd.add_argument('--head', type=int, default=-1)
+    diff_cmd.add_argument('--top', type=int, default=10)
+
+    commands.add_parser('history', help='list recorded runs')
+
+    args = parser.parse_args()
+
+    if args.command == 'ingest':
+        added = ingest(args.reports, args.history)
+        print(f"Recorded {len(added)} new run(s) in {args.history}")
+        return 0
+
+    history = load_history(args.history)
+
+    if args.command == 'history':
+        for index, run in enumerate(history):
+            metrics = '  '.join(f"{name} {format_metric(name, value)}" for name, value in run['metrics'].items())
+            print(f"[{index}] {run['fetchTime']}  score {run['score']}  {metrics}")
+        return 0
+
+    if args.command == 'check':
+        run = pick_run(history, args.run, args.history)
+        budgets = dict(DEFAULT_BUDGETS)
+        if args.budgets:
+            with open(args.budgets, 'r', encoding='utf-8') as file:
+                budgets.update(json.load(file))
+
+        failures = check_budgets(run, budgets)
+        print(f"Run {run['fetchTime']} ({run['url']})")
+        for name, actual, budget in failures:
+            print(f"❌ {name}: {format_metric(name, actual)} (budget {format_metric(name, budget)})")
+        if failures:
+            print(f"{len(failures)} budget(s) blown")
+            return 1
+        print("✅ All budgets met")
+        return 0
+
+    if args.command == 'diff':
+        base = pick_run(history, args.base, args.history)
+        head = pick_run(history, args.head, args.history)
+        print(f"Comparing {base['fetchTime']} -> {head['fetchTime']}")
+
+        print("\nMetrics:")
+        for name in METRICS.values():
+            if name in base['metrics'] and name in head['metrics']:
+                before, after = base['metrics'][name], head['metrics'][name]
+                print(f"  {name:<4} {format_metric(name, before):>12} -> {format_metric(name, after):>12}")
+
+        print("\nTop regressing audits:")
+        for score_drop, relative_rise, audit_id, before, after in regressing_audits(base, head, args.top):
+            score = f"score -{score_drop:.2f}" if score_drop else "score same "
+            rise = f"+{relative_rise:.0%}" if relative_rise != float('inf') else "new"
+            print(f"  {audit_id:<40} {score}  value {before:,.0f} -> {after:,.0f} ({rise})")
+
+        print("\nTop regressing resources:")
+        for delta, url, is_new in regressing_resources(base, head, args.top):
+            print(f"  +{delta:>10,} B  {'(new) ' if is_new else ''}{url}")
+
+        print("\nRemoved resources:")
+        for size, url in removed_resources(base, head, args.top):
+            print(f"  -{size:>10,} B  {url}")
+        return 0
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
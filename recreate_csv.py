@@ -2,6 +2,8 @@
 
 import csv
 
+from catalog_publish import publish_catalog
+
 # Define the correct product data
 products = [
     {
@@ -157,8 +159,8 @@ fieldnames = [
     'potential_profit', 'weight', 'length', 'width', 'height'
 ]
 
-# Create a clean CSV with proper format
-with open('export.csv', 'w', newline='', encoding='utf-8') as csvfile:
+# Create a clean CSV with proper format, published as a new generation
+with publish_catalog('export.csv') as csvfile:
     writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
     writer.writeheader()
     
@@ -55,8 +55,10 @@ try {
   await fs.copyFile('export.csv', 'export.csv.backup')
   console.log('💾 Created backup: export.csv.backup')
   
-  // Write the updated CSV
-  await fs.writeFile('export.csv', updatedCsv)
+  // Write the updated CSV to a temp file and rename it, so readers never see a truncated catalog
+  const tmpPath = `.export.csv.${process.pid}.tmp`
+  await fs.writeFile(tmpPath, updatedCsv)
+  await fs.rename(tmpPath, 'export.csv')
   
   console.log(`✅ Updated ${updatedRows} rows with ${updatedImages} image URLs`)
   console.log('📝 CSV has been updated with Cloudinary URLs')
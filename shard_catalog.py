@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Split export.csv into per-status and per-collection shard files.
+
+Hot pages only need a slice of the catalog (live items, the featured
+collection, ...), so each slice is written as its own small CSV with the
+same columns as export.csv, plus a manifest.json holding row counts and
+SHA-256 checksums:
+
+    catalog_shards/
+        manifest.json
+        status/live.csv, status/coming-soon.csv, status/draft.csv, status/sold-out.csv
+        collection/featured.csv, collection/staff-picks.csv, ...
+
+Status shards partition the catalog (every row lands in exactly one);
+collection shards can overlap. Re-running the script syncs the layout:
+only shards whose contents changed are rewritten, and shards that became
+empty are removed.
+
+Once built, the shards follow every publish made through catalog_publish.py
+(fix_csv_columns.py, recreate_csv.py, build_drop_schedule.py apply). The
+Node routes that write export.csv directly do not re-shard, so run this
+script after those. It takes the same writer lock as those publishes, so
+the two never sync at once.
+
+Usage:
+    python3 shard_catalog.py [--csv export.csv] [--out catalog_shards]
+    python3 shard_catalog.py --verify [--out catalog_shards]
+"""
+
+import argparse
+import csv
+import hashlib
+import io
+import json
+import os
+import sys
+
+from catalog_publish import write_atomic, writer_lock
+
+SHARD_DIR = 'catalog_shards'
+MANIFEST_NAME = 'manifest.json'
+MANIFEST_VERSION = 1
+
+
+def is_true(value):
+    # Same rule as parseBool() in lib/listings.ts
+    return value in ('true', '1')
+
+
+def is_sold_out(row):
+    if is_true(row.get('out_of_stock', '')):
+        return True
+    try:
+        return int(float(row.get('quantity') or 0)) <= 0
+    except ValueError:
+        return False
+
+
+def status_of(row):
+    """Storefront status bucket; sold-out live items get their own shard"""
+    status = (row.get('status') or 'live').strip()
+    if status not in ('live', 'coming-soon', 'draft'):
+        status = 'live'
+    if status == 'live' and is_sold_out(row):
+        return 'sold-out'
+    return status
+
+
+# Collection name -> membership test, matching the storefront sections
+COLLECTIONS = {
+    'featured': lambda row: is_true(row.get('featured', '')) or is_true(row.get('show_in_featured', '')),
+    'staff-picks': lambda row: is_true(row.get('staff_pick', '')) or is_true(row.get('show_in_staff_picks', '')),
+    'limited-editions': lambda row: (is_true(row.get('limited_edition', ''))
+                                     or is_true(row.get('show_in_limited_editions', ''))),
+    'coming-soon': lambda row: is_true(row.get('show_in_coming_soon', '')),
+    'new-releases': lambda row: is_true(row.get('show_in_new_releases', '')),
+}
+
+
+def shard_rows(rows):
+    """Map of shard path (relative to the shard dir) -> rows"""
+    shards = {}
+    for row in rows:
+        if not row.get('sku'):
+            continue
+        shards.setdefault(f"status/{status_of(row)}.csv", []).append(row)
+        for name, member in COLLECTIONS.items():
+            if member(row):
+                shards.setdefault(f"collection/{name}.csv", []).append(row)
+    return shards
+
+
+def render_csv(fieldnames, rows):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fieldnames)
+    writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue().encode('utf-8')
+
+
+def sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def load_manifest(out_dir):
+    path = os.path.join(out_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as file:
+        manifest = json.load(file)
+    if manifest.get('version') != MANIFEST_VERSION:
+        return None
+    return manifest
+
+
+def sync_shards(csv_path, out_dir):
+    """Bring the shard layout in line with csv_path; returns (written, removed, unchanged)"""
+    with open(csv_path, 'rb') as file:
+        source = file.read()
+
+    manifest = load_manifest(out_dir)
+    previous = manifest['shards'] if manifest else {}
+    all_present = all(os.path.exists(os.path.join(out_dir, shard_path)) for shard_path in previous)
+    if manifest and manifest['source_sha256'] == sha256(source) and all_present:
+        return [], [], sorted(previous)
+
+    reader = csv.DictReader(io.StringIO(source.decode('utf-8'), newline=''))
+    fieldnames = reader.fieldnames
+    shards = shard_rows(reader)
+
+    written, unchanged, entries = [], [], {}
+    for shard_path in sorted(shards):
+        data = render_csv(fieldnames, shards[shard_path])
+        checksum = sha256(data)
+        full_path = os.path.join(out_dir, shard_path)
+        entries[shard_path] = {'rows': len(shards[shard_path]), 'bytes': len(data), 'sha256': checksum}
+
+        if previous.get(shard_path, {}).get('sha256') == checksum and os.path.exists(full_path):
+            unchanged.append(shard_path)
+            continue
+        write_atomic(full_path, data)
+        written.append(shard_path)
+
+    removed = sorted(set(previous) - set(entries))
+    for shard_path in removed:
+        full_path = os.path.join(out_dir, shard_path)
+        if os.path.exists(full_path):
+            os.remove(full_path)
+
+    new_manifest = {
+        'version': MANIFEST_VERSION,
+        'source': os.path.basename(csv_path),
+        'source_sha256': sha256(source),
+        'columns': fieldnames,
+        'shards': entries,
+    }
+    # Manifest goes last so it never points at shards that are not on disk yet
+    write_atomic(os.path.join(out_dir, MANIFEST_NAME),
+                 json.dumps(new_manifest, indent=2).encode('utf-8'))
+    return written, removed, unchanged
+
+
+def sync_if_built(csv_path):
+    """Re-sync shards after a publish, if they were built from this catalog"""
+    out_dir = os.path.join(os.path.dirname(os.path.abspath(csv_path)), SHARD_DIR)
+    manifest = load_manifest(out_dir)
+    if manifest is None or manifest['source'] != os.path.basename(csv_path):
+        return None
+    return sync_shards(csv_path, out_dir)
+
+
+def verify_shards(out_dir):
+    """List of problems found comparing shard files to the manifest"""
+    manifest = load_manifest(out_dir)
+    if manifest is None:
+        return [f"No usable {MANIFEST_NAME} in {out_dir}"]
+
+    problems = []
+    for shard_path, entry in manifest['shards'].items():
+        full_path = os.path.join(out_dir, shard_path)
+        if not os.path.exists(full_path):
+            problems.append(f"{shard_path}: missing")
+            continue
+        with open(full_path, 'rb') as file:
+            if sha256(file.read()) != entry['sha256']:
+                problems.append(f"{shard_path}: checksum mismatch")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Shard the catalog by status and collection')
+    parser.add_argument('--csv', default='export.csv')
+    parser.add_argument('--out', default=SHARD_DIR)
+    parser.add_argument('--verify', action='store_true', help='check shards against the manifest')
+    args = parser.parse_args()
+
+    if args.verify:
+        problems = verify_shards(args.out)
+        for problem in problems:
+            print(f"❌ {problem}")
+        if problems:
+            return 1
+        print(f"✅ All shards in {args.out} match the manifest")
+        return 0
+
+    # Same lock publish_catalog() holds while it re-syncs, so an older manifest never lands last
+    with writer_lock(args.csv):
+        written, removed, unchanged = sync_shards(args.csv, args.out)
+    for shard_path in written:
+        print(f"Wrote {shard_path}")
+    for shard_path in removed:
+        print(f"Removed {shard_path}")
+    print(f"Shards synced: {len(written)} written, {len(removed)} removed, {len(unchanged)} unchanged")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
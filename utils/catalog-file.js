@@ -0,0 +1,23 @@
+const fs = require('fs')
+const path = require('path')
+
+// Write a temp file and rename it over the CSV so readers never see a truncated catalog.
+// Sync counterpart of writeCatalogFile() in lib/catalog-file.ts
+function writeCatalogFileSync(filePath, content) {
+  const tmpPath = path.join(path.dirname(filePath), `.${path.basename(filePath)}.${process.pid}.${Date.now()}.tmp`)
+  const fd = fs.openSync(tmpPath, 'w')
+  try {
+    fs.writeFileSync(fd, content, 'utf-8')
+    fs.fsyncSync(fd)
+  } finally {
+    fs.closeSync(fd)
+  }
+  try {
+    fs.renameSync(tmpPath, filePath)
+  } catch (error) {
+    fs.rmSync(tmpPath, { force: true })
+    throw error
+  }
+}
+
+module.exports = { writeCatalogFileSync }
@@ -1,6 +1,7 @@
 const fs = require('fs')
 const { parse } = require('csv-parse/sync')
 const { stringify } = require('csv-stringify/sync')
+const { writeCatalogFileSync } = require('./catalog-file')
 
 const CSV_PATH = './export.csv'
 
@@ -41,7 +42,7 @@ async function checkAndUpdateDropDates() {
         columns: Object.keys(updatedRecords[0])
       })
       
-      fs.writeFileSync(CSV_PATH, csvOutput, 'utf-8')
+      writeCatalogFileSync(CSV_PATH, csvOutput)
       console.log(`Successfully auto-launched ${updatedCount} product(s)`)
     } else {
       console.log('No products ready to launch at this time')